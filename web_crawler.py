@@ -11,32 +11,130 @@ Web Crawler - 网页爬虫程序
 import os
 import sys
 import re
+import math
+import struct
 import time
+import itertools
 import hashlib
 import logging
 import argparse
+import atexit
+import threading
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, Tag, NavigableString, CData
+from urllib.parse import urljoin, urlparse, urlsplit, urlunsplit, parse_qsl, urlencode
 from datetime import datetime
+from collections import deque
 import concurrent.futures
 import json
+from queue import SimpleQueue
+from logging.handlers import QueueHandler, QueueListener
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("crawler.log", encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+# 配置日志：日志记录经队列交给后台线程写入文件和控制台，避免阻塞爬取线程
+_log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+_log_handlers = [
+    logging.FileHandler("crawler.log", encoding='utf-8'),
+    logging.StreamHandler()
+]
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+_log_queue = SimpleQueue()
+_log_listener = QueueListener(_log_queue, *_log_handlers)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+logging.getLogger().setLevel(logging.INFO)
+logging.getLogger().addHandler(QueueHandler(_log_queue))
 logger = logging.getLogger("WebCrawler")
 
+# 支持保存的图片扩展名
+IMG_EXTS = frozenset({'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp'})
+# 需要爬取的链接协议
+HTTP_SCHEMES = ('http://', 'https://')
+# 各协议的默认端口，规范化URL时省略
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+# 规范化URL时去除的跟踪参数(另外去除所有 utm_ 开头的参数)
+TRACKING_PARAMS = frozenset({'gclid', 'fbclid'})
+# 含换行的连续空白(换行符与 str.splitlines 一致)，用于去除空行和行首尾空白
+# 只从空白段的开头尝试匹配，避免长空白段被逐位置重复扫描(平方级耗时)
+LINE_BREAK_RE = re.compile(
+    r'(?<![^\S\n\r\v\f\x1c-\x1e\x85\u2028\u2029])'
+    r'[^\S\n\r\v\f\x1c-\x1e\x85\u2028\u2029]*[\n\r\v\f\x1c-\x1e\x85\u2028\u2029]\s*'
+)
+# 不提取文本的元素；其中的图片和链接仍会被收集(如<noscript>里的备用图片)
+HIDDEN_TAGS = frozenset({'script', 'style', 'noscript', 'template'})
+# 计入正文的字符串类型，与 get_text() 默认一致(不含注释、脚本等)
+TEXT_STRING_TYPES = (NavigableString, CData)
+
+class BloomFilter:
+    """布隆过滤器，用少量内存判断元素是否可能出现过(存在极低概率误判)"""
+    
+    _HEADER = '<QIQQ'  # 序列化头: 比特数, 哈希函数个数, 预计元素数量, 已添加元素数量
+    
+    def __init__(self, capacity, error_rate=1e-6):
+        """
+        初始化布隆过滤器
+        
+        Args:
+            capacity (int): 预计元素数量
+            error_rate (float): 目标误判率
+        """
+        self.capacity = capacity
+        self.count = 0
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+    
+    def _indexes(self, item):
+        """用双重哈希生成元素对应的比特位置"""
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+    
+    def add(self, item):
+        """添加元素，有新比特位被置位时计数加一(重复添加不计数)"""
+        added = False
+        for index in self._indexes(item):
+            mask = 1 << (index & 7)
+            if not self.bits[index >> 3] & mask:
+                self.bits[index >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+    
+    @property
+    def is_full(self):
+        """元素数量是否已超过预计容量(此后误判率会快速上升)"""
+        return self.count > self.capacity
+    
+    def __contains__(self, item):
+        return all(self.bits[index >> 3] & (1 << (index & 7)) for index in self._indexes(item))
+    
+    def to_bytes(self):
+        """序列化为字节，用于保存到文件"""
+        header = struct.pack(self._HEADER, self.num_bits, self.num_hashes, self.capacity, self.count)
+        return header + bytes(self.bits)
+    
+    @classmethod
+    def from_bytes(cls, data):
+        """从 to_bytes() 的结果恢复布隆过滤器"""
+        bloom = cls.__new__(cls)
+        bloom.num_bits, bloom.num_hashes, bloom.capacity, bloom.count = struct.unpack_from(cls._HEADER, data)
+        if bloom.num_bits == 0 or bloom.num_hashes == 0 or bloom.capacity == 0:
+            raise ValueError("布隆过滤器参数无效")
+        bloom.bits = bytearray(data[struct.calcsize(cls._HEADER):])
+        if len(bloom.bits) != (bloom.num_bits + 7) // 8:
+            raise ValueError("布隆过滤器数据长度不匹配")
+        return bloom
+
 class WebCrawler:
     """网页爬虫类，用于抓取网页内容和图片"""
     
-    def __init__(self, base_url, max_pages=10, max_depth=2, timeout=10):
+    def __init__(self, base_url, max_pages=10, max_depth=2, timeout=10, max_workers=16,
+                 max_image_bytes=20 * 1024 * 1024, crawl_delay=1, force=False):
         """
         初始化爬虫
         
@@ -45,20 +143,80 @@ class WebCrawler:
             max_pages (int): 最大爬取页面数
             max_depth (int): 最大爬取深度
             timeout (int): 请求超时时间(秒)
+            max_workers (int): 并发爬取页面的线程数
+            max_image_bytes (int): 单张图片的最大字节数，超过则跳过
+            crawl_delay (float): 同一站点两次请求之间的最小间隔(秒)
+            force (bool): 是否重新爬取历史运行中已爬过的页面
         """
         self.base_url = base_url
         self.max_pages = max_pages
         self.max_depth = max_depth
         self.timeout = timeout
-        self.visited_urls = set()
+        self.max_workers = max_workers
+        self.max_image_bytes = max_image_bytes
+        self.crawl_delay = crawl_delay
+        self.force = force
+        self.visited_urls = set()  # 已爬取页面的规范化URL
+        self.enqueued = set()  # 已加入过队列的规范化URL，避免重复入队
         self.image_hashes = set()
+        self.url_bloom = BloomFilter(capacity=100_000, error_rate=1e-6)
+        self._lock = threading.Lock()
+        self._host_next = {}  # 站点 -> 下一次允许请求的时间
+        self._seq = itertools.count()  # 文件名序号，避免并发时重名
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
         
+        # 扩大连接池以复用并发请求的连接，并对临时性错误自动重试
+        adapter = HTTPAdapter(
+            pool_connections=64,
+            pool_maxsize=64,
+            max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[429, 502, 503, 504])
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        # 所有页面共用一个图片下载线程池，避免每个页面重复创建线程
+        self.image_executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers * 2)
+        # 文本写入使用单独的小线程池，与网络请求并行且限制同时写盘的数量
+        self.io_executor = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+        
         # 创建存储目录
         self.setup_storage()
+        
+        # 加载历史运行中已爬取页面的布隆过滤器，用于增量爬取；每个站点单独一个文件
+        host = re.sub(r'[^\w.-]', '_', urlparse(self.canonicalize_url(base_url)).netloc)
+        self.visited_bloom_path = os.path.join(self.history_dir, f"visited_{host}.bloom")
+        self.visited_bloom = self.load_visited_bloom()
+    
+    def load_visited_bloom(self):
+        """加载已爬取页面的布隆过滤器，不存在、损坏或已超出容量时新建"""
+        capacity = 200_000
+        if os.path.exists(self.visited_bloom_path):
+            try:
+                with open(self.visited_bloom_path, 'rb') as f:
+                    bloom = BloomFilter.from_bytes(f.read())
+            except Exception as e:
+                logger.warning(f"加载已爬取记录 {self.visited_bloom_path} 时出错: {str(e)}")
+            else:
+                if not bloom.is_full:
+                    return bloom
+                # 超出容量后误判率过高，会把新页面误判为已爬取，因此放弃旧记录并扩大容量
+                capacity = bloom.capacity * 2
+                logger.warning(f"已爬取记录 {self.visited_bloom_path} 超出容量 "
+                               f"({bloom.count}/{bloom.capacity})，将重新记录，容量扩大为 {capacity}")
+        return BloomFilter(capacity=capacity, error_rate=1e-4)
+    
+    def save_visited_bloom(self):
+        """将本次爬取的页面加入布隆过滤器并保存到文件"""
+        for url in self.visited_urls:
+            self.visited_bloom.add(url)
+        
+        tmp_path = self.visited_bloom_path + '.part'
+        with open(tmp_path, 'wb') as f:
+            f.write(self.visited_bloom.to_bytes())
+        os.replace(tmp_path, self.visited_bloom_path)
     
     def setup_storage(self):
         """设置存储目录"""
@@ -66,6 +224,8 @@ class WebCrawler:
         desktop = os.path.join(os.path.expanduser("~"), "Desktop")
         date_str = datetime.now().strftime("%Y%m%d")
         self.storage_dir = os.path.join(desktop, f"WebCrawlerData_{date_str}")
+        # 跨日期共享的目录，保存增量爬取记录
+        self.history_dir = os.path.join(desktop, "WebCrawlerData")
         
         # 创建文本和图片子目录
         self.text_dir = os.path.join(self.storage_dir, "texts")
@@ -74,16 +234,76 @@ class WebCrawler:
         # 确保目录存在
         os.makedirs(self.text_dir, exist_ok=True)
         os.makedirs(self.image_dir, exist_ok=True)
+        os.makedirs(self.history_dir, exist_ok=True)
         
         logger.info(f"存储目录已创建: {self.storage_dir}")
     
+    def close(self):
+        """释放线程池和网络连接"""
+        self.image_executor.shutdown(wait=True)
+        self.io_executor.shutdown(wait=True)
+        self.session.close()
+    
+    def canonicalize_url(self, url):
+        """
+        规范化URL，作为去重的键
+        
+        去除片段和跟踪参数，参数排序，主机名小写，省略默认端口和末尾的斜杠
+        
+        Args:
+            url (str): 原始URL
+            
+        Returns:
+            str: 规范化后的URL，无法解析时返回原始URL
+        """
+        try:
+            parts = urlsplit(url)
+            scheme = parts.scheme.lower()
+            host = parts.hostname or ''
+            if ':' in host:
+                host = f"[{host}]"  # IPv6地址
+            port = parts.port
+        except ValueError:
+            return url
+        
+        if port and port != DEFAULT_PORTS.get(scheme):
+            host = f"{host}:{port}"
+        userinfo = parts.netloc.rpartition('@')[0]
+        netloc = f"{userinfo}@{host}" if userinfo else host
+        
+        path = parts.path
+        if len(path) > 1:
+            path = path.rstrip('/') or '/'
+        path = path or '/'
+        
+        query = urlencode(sorted(
+            (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if key not in TRACKING_PARAMS and not key.startswith('utm_')
+        ))
+        return urlunsplit((scheme, netloc, path, query, ''))
+    
     def get_url_hash(self, url):
-        """生成URL的哈希值"""
-        return hashlib.md5(url.encode('utf-8')).hexdigest()
+        """生成URL的哈希值(16位十六进制，用于文件名)"""
+        return hashlib.blake2b(url.encode('utf-8', 'surrogatepass'), digest_size=8).hexdigest()
     
-    def get_image_hash(self, image_data):
-        """生成图片内容的哈希值"""
-        return hashlib.md5(image_data).hexdigest()
+    def new_file_id(self):
+        """生成唯一的文件名后缀(纳秒时间戳_序号)"""
+        return f"{time.time_ns()}_{next(self._seq)}"
+    
+    def new_image_hasher(self):
+        """创建图片内容的哈希对象(可增量计算，摘要为原始字节，仅用于去重)"""
+        return hashlib.blake2b(digest_size=16)
+    
+    def wait_for_host(self, url):
+        """按站点限速，保证同一站点的请求间隔不小于 crawl_delay"""
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            next_time = max(now, self._host_next.get(host, now))
+            self._host_next[host] = next_time + self.crawl_delay
+        wait = next_time - now
+        if wait > 0:
+            time.sleep(wait)
     
     def download_page(self, url, depth=0):
         """
@@ -96,91 +316,137 @@ class WebCrawler:
         Returns:
             tuple: (soup对象, 响应对象) 或 (None, None)
         """
-        if url in self.visited_urls or len(self.visited_urls) >= self.max_pages or depth > self.max_depth:
+        key = self.canonicalize_url(url)
+        if key in self.visited_urls or len(self.visited_urls) >= self.max_pages or depth > self.max_depth:
             return None, None
         
         try:
+            self.wait_for_host(url)
             logger.info(f"正在爬取: {url}")
             response = self.session.get(url, timeout=self.timeout)
             response.raise_for_status()
-            response.encoding = response.apparent_encoding
             
-            self.visited_urls.add(url)
-            soup = BeautifulSoup(response.text, 'html.parser')
+            self.visited_urls.add(key)
+            # 直接传入字节，由解析器根据HTTP头声明的编码或<meta charset>解码
+            content_type = response.headers.get('Content-Type', '').lower()
+            encoding = response.encoding if 'charset' in content_type else None
+            soup = BeautifulSoup(response.content, 'lxml', from_encoding=encoding)
             return soup, response
         except Exception as e:
             logger.error(f"爬取 {url} 时出错: {str(e)}")
             return None, None
     
-    def extract_text(self, soup, url):
+    def parse_page(self, soup):
         """
-        提取网页文本内容
+        遍历一次网页，同时提取文本、图片地址和链接地址
         
         Args:
             soup (BeautifulSoup): 解析后的网页
-            url (str): 网页URL
             
         Returns:
-            str: 提取的文本内容
+            tuple: (文本内容, 图片src列表, 链接href列表)
         """
-        # 移除脚本和样式元素
-        for script in soup(["script", "style"]):
-            script.extract()
+        texts = []
+        img_srcs = []
+        hrefs = []
         
-        # 获取文本
-        text = soup.get_text(separator='\n', strip=True)
+        # 深度优先遍历，栈中元素为 (节点, 是否位于不可见元素内)
+        stack = [(child, False) for child in reversed(soup.contents)]
+        while stack:
+            node, hidden = stack.pop()
+            if isinstance(node, Tag):
+                if node.name == 'img':
+                    src = node.get('src')
+                    if src:
+                        img_srcs.append(src)
+                elif node.name == 'a':
+                    href = node.get('href')
+                    if href is not None:
+                        hrefs.append(href)
+                hidden = hidden or node.name in HIDDEN_TAGS
+                stack.extend((child, hidden) for child in reversed(node.contents))
+            elif not hidden and type(node) in TEXT_STRING_TYPES:
+                text = node.strip()
+                if text:
+                    texts.append(text)
         
         # 处理多余的空行
-        lines = [line.strip() for line in text.splitlines() if line.strip()]
-        text = '\n'.join(lines)
+        text = LINE_BREAK_RE.sub('\n', '\n'.join(texts)).strip()
+        return text, img_srcs, hrefs
+    
+    def save_text(self, text, url):
+        """
+        保存网页文本内容
         
+        Args:
+            text (str): 提取的文本内容
+            url (str): 网页URL
+            
+        Returns:
+            str: 保存的文件路径
+        """
         # 保存文本
         url_hash = self.get_url_hash(url)
-        timestamp = int(time.time())
-        filename = f"{url_hash}_{timestamp}.txt"
+        filename = f"{url_hash}_{self.new_file_id()}.txt"
         filepath = os.path.join(self.text_dir, filename)
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            # 添加元数据
-            f.write(f"URL: {url}\n")
-            f.write(f"爬取时间: {datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"{'='*50}\n\n")
-            f.write(text)
+        # 添加元数据，拼接后一次性写入
+        header = (
+            f"URL: {url}\n"
+            f"爬取时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+            f"{'='*50}\n\n"
+        )
+        with open(filepath, 'w', encoding='utf-8', buffering=1024 * 1024) as f:
+            f.write(header + text)
         
         logger.info(f"已保存文本: {filepath}")
-        return text
+        return filepath
     
-    def extract_images(self, soup, base_url):
+    def extract_images(self, img_srcs, base_url):
         """
-        提取并下载网页中的图片
+        下载网页中的图片
         
         Args:
-            soup (BeautifulSoup): 解析后的网页
+            img_srcs (list): 图片src列表，由 parse_page() 提取
             base_url (str): 基础URL，用于解析相对路径
             
         Returns:
             int: 成功下载的图片数量
         """
-        img_tags = soup.find_all('img')
         downloaded_count = 0
         
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            futures = []
-            for img in img_tags:
-                src = img.get('src')
-                if not src:
-                    continue
-                
-                # 处理相对URL
-                img_url = urljoin(base_url, src)
-                futures.append(executor.submit(self.download_image, img_url))
-            
-            for future in concurrent.futures.as_completed(futures):
-                if future.result():
-                    downloaded_count += 1
+        futures = []
+        for src in img_srcs:
+            # 处理相对URL
+            img_url = urljoin(base_url, src)
+            futures.append(self.image_executor.submit(self.download_image, img_url))
+        
+        for future in concurrent.futures.as_completed(futures):
+            if future.result():
+                downloaded_count += 1
         
+        logger.info(f"页面 {base_url} 下载图片: {downloaded_count}/{len(futures)}")
         return downloaded_count
     
+    def check_image_headers(self, img_url, headers):
+        """
+        根据响应头检查是否为大小合适的图片
+        
+        Args:
+            img_url (str): 图片URL
+            headers (dict): 响应头
+            
+        Returns:
+            bool: 是否需要下载
+        """
+        content_type = headers.get('Content-Type', '')
+        if not content_type.startswith('image/'):
+            return False
+        if int(headers.get('Content-Length') or 0) > self.max_image_bytes:
+            logger.debug(f"跳过过大图片: {img_url}")
+            return False
+        return True
+    
     def download_image(self, img_url):
         """
         下载单个图片
@@ -191,74 +457,134 @@ class WebCrawler:
         Returns:
             bool: 下载是否成功
         """
-        try:
-            response = self.session.get(img_url, timeout=self.timeout)
-            response.raise_for_status()
-            
-            # 检查内容类型
-            content_type = response.headers.get('Content-Type', '')
-            if not content_type.startswith('image/'):
+        # 同一图片URL(规范化后)只下载一次，失败的URL也不再重试
+        key = self.canonicalize_url(img_url)
+        with self._lock:
+            if key in self.url_bloom:
+                logger.debug(f"跳过重复图片: {img_url}")
                 return False
-            
-            # 计算图片哈希值用于去重
-            img_data = response.content
-            img_hash = self.get_image_hash(img_data)
-            
-            # 如果图片已存在，跳过
-            if img_hash in self.image_hashes:
-                logger.info(f"跳过重复图片: {img_url}")
+            self.url_bloom.add(key)
+        
+        try:
+            # 先用HEAD请求检查类型和大小，不符合的不再发起GET；HEAD失败或不受支持时直接GET
+            try:
+                head = self.session.head(img_url, timeout=self.timeout, allow_redirects=True)
+            except requests.RequestException as e:
+                logger.debug(f"HEAD请求 {img_url} 失败，改用GET: {str(e)}")
+                head = None
+            if head is not None and head.ok and not self.check_image_headers(img_url, head.headers):
                 return False
             
-            self.image_hashes.add(img_hash)
-            
-            # 生成文件名
-            url_hash = self.get_url_hash(img_url)
-            timestamp = int(time.time())
-            
-            # 从URL中提取文件扩展名
-            parsed_url = urlparse(img_url)
-            path = parsed_url.path
-            ext = os.path.splitext(path)[1]
-            if not ext or ext.lower() not in ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp']:
-                ext = '.jpg'  # 默认扩展名
-            
-            filename = f"{url_hash}_{timestamp}{ext}"
-            filepath = os.path.join(self.image_dir, filename)
-            
-            # 保存图片
-            with open(filepath, 'wb') as f:
-                f.write(img_data)
+            with self.session.get(img_url, timeout=self.timeout, stream=True) as response:
+                response.raise_for_status()
+                
+                # 检查内容类型和大小
+                if not self.check_image_headers(img_url, response.headers):
+                    return False
+                
+                # 生成文件名
+                url_hash = self.get_url_hash(img_url)
+                
+                # 从URL中提取文件扩展名
+                parsed_url = urlparse(img_url)
+                path = parsed_url.path
+                ext = os.path.splitext(path)[1]
+                if ext.lower() not in IMG_EXTS:
+                    ext = '.jpg'  # 默认扩展名
+                
+                filename = f"{url_hash}_{self.new_file_id()}{ext}"
+                filepath = os.path.join(self.image_dir, filename)
+                tmp_path = filepath + '.part'
+                
+                # 边下载边计算哈希值并写入临时文件，避免整张图片驻留内存
+                saved = False
+                try:
+                    hasher = self.new_image_hasher()
+                    size = 0
+                    with open(tmp_path, 'wb', buffering=1024 * 1024) as f:
+                        for chunk in response.iter_content(chunk_size=64 * 1024):
+                            size += len(chunk)
+                            if size > self.max_image_bytes:
+                                logger.debug(f"跳过过大图片: {img_url}")
+                                return False
+                            hasher.update(chunk)
+                            f.write(chunk)
+                    
+                    # 如果图片已存在，跳过
+                    img_hash = hasher.digest()
+                    with self._lock:
+                        if img_hash in self.image_hashes:
+                            logger.debug(f"跳过重复图片: {img_url}")
+                            return False
+                        self.image_hashes.add(img_hash)
+                    
+                    os.replace(tmp_path, filepath)
+                    saved = True
+                finally:
+                    if not saved and os.path.exists(tmp_path):
+                        os.unlink(tmp_path)
             
-            logger.info(f"已下载图片: {filepath}")
+            logger.debug(f"已下载图片: {filepath}")
             return True
         except Exception as e:
             logger.error(f"下载图片 {img_url} 时出错: {str(e)}")
             return False
     
-    def extract_links(self, soup, base_url):
+    def extract_links(self, hrefs, base_url):
         """
-        提取网页中的链接
+        从链接地址中筛选需要爬取的链接
         
         Args:
-            soup (BeautifulSoup): 解析后的网页
+            hrefs (list): 链接href列表，由 parse_page() 提取
             base_url (str): 基础URL，用于解析相对路径
             
         Returns:
-            list: 提取的链接列表
+            list: 提取的链接列表(已去重，保持页面中的顺序)
         """
+        base_netloc = urlparse(base_url).netloc
         links = []
-        for a_tag in soup.find_all('a', href=True):
-            href = a_tag['href']
+        seen = set()
+        for href in hrefs:
             full_url = urljoin(base_url, href)
             
             # 过滤非HTTP链接和外部链接
-            if full_url.startswith(('http://', 'https://')):
+            if full_url.startswith(HTTP_SCHEMES) and full_url not in seen:
                 # 确保只爬取同一域名下的页面
-                if urlparse(full_url).netloc == urlparse(base_url).netloc:
+                if urlparse(full_url).netloc == base_netloc:
+                    seen.add(full_url)
                     links.append(full_url)
         
         return links
     
+    def process_page(self, url, depth):
+        """
+        下载单个网页并提取文本、图片和链接，在线程池中执行
+        
+        Args:
+            url (str): 网页URL
+            depth (int): 当前爬取深度
+            
+        Returns:
+            tuple: (图片数量, 链接列表) 或 None(爬取失败)
+        """
+        soup, response = self.download_page(url, depth)
+        if soup is None:
+            return None
+        
+        text, img_srcs, hrefs = self.parse_page(soup)
+        
+        # 保存文本，在IO线程池中写盘，同时开始下载图片
+        text_future = self.io_executor.submit(self.save_text, text, url)
+        
+        # 下载图片
+        img_count = self.extract_images(img_srcs, url)
+        
+        # 如果未达到最大深度，则提取链接
+        links = self.extract_links(hrefs, url) if depth < self.max_depth else []
+        
+        text_future.result()
+        return img_count, links
+    
     def crawl(self):
         """
         开始爬取网页
@@ -266,46 +592,63 @@ class WebCrawler:
         Returns:
             dict: 爬取结果统计
         """
-        queue = [(self.base_url, 0)]  # (url, depth)
-        processed = 0
+        queue = deque([(self.base_url, 0)])  # (url, depth)
+        self.enqueued.add(self.canonicalize_url(self.base_url))
+        pending = {}  # future -> (url, depth)
         
         stats = {
             'pages_crawled': 0,
             'texts_saved': 0,
             'images_downloaded': 0,
+            'pages_skipped': 0,
             'errors': 0
         }
         
-        while queue and len(self.visited_urls) < self.max_pages:
-            url, depth = queue.pop(0)
-            
-            if url in self.visited_urls:
-                continue
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            while queue or pending:
+                # 在不超过最大页面数的前提下，从队列中提交新任务；同时提交的任务数不超过线程数，
+                # 其余URL留在队列中，中断时无需等待大量排队任务
+                while (queue and len(pending) < self.max_workers
+                       and len(self.visited_urls) + len(pending) < self.max_pages):
+                    url, depth = queue.popleft()
+                    key = self.canonicalize_url(url)
+                    if key in self.visited_urls:
+                        continue
+                    # 历史运行中已爬过的页面直接跳过(起始页面除外，需要从中发现新链接)
+                    if depth > 0 and not self.force and key in self.visited_bloom:
+                        logger.info(f"跳过已爬取页面: {url}")
+                        stats['pages_skipped'] += 1
+                        continue
+                    pending[executor.submit(self.process_page, url, depth)] = (url, depth)
                 
-            soup, response = self.download_page(url, depth)
-            if soup is None:
-                stats['errors'] += 1
-                continue
-            
-            stats['pages_crawled'] += 1
-            
-            # 提取并保存文本
-            self.extract_text(soup, url)
-            stats['texts_saved'] += 1
-            
-            # 提取并下载图片
-            img_count = self.extract_images(soup, url)
-            stats['images_downloaded'] += img_count
-            
-            # 如果未达到最大深度，则提取链接并加入队列
-            if depth < self.max_depth:
-                links = self.extract_links(soup, url)
-                for link in links:
-                    if link not in self.visited_urls:
-                        queue.append((link, depth + 1))
-            
-            # 简单的延迟，避免请求过快
-            time.sleep(1)
+                if not pending:
+                    break
+                
+                done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    url, depth = pending.pop(future)
+                    result = future.result()
+                    if result is None:
+                        stats['errors'] += 1
+                        continue
+                    
+                    img_count, links = result
+                    stats['pages_crawled'] += 1
+                    stats['texts_saved'] += 1
+                    stats['images_downloaded'] += img_count
+                    
+                    for link in links:
+                        # 用规范化URL去重，请求时仍使用原始URL
+                        key = self.canonicalize_url(link)
+                        if key not in self.visited_urls and key not in self.enqueued:
+                            self.enqueued.add(key)
+                            queue.append((link, depth + 1))
+        finally:
+            # 中断或出错时取消尚未开始的任务，只等待正在执行的页面
+            executor.shutdown(wait=True, cancel_futures=True)
+            # 保存已爬取记录，供下次增量爬取
+            self.save_visited_bloom()
         
         return stats
 
@@ -316,6 +659,9 @@ def parse_arguments():
     parser.add_argument('-p', '--max-pages', type=int, default=10, help='最大爬取页面数 (默认: 10)')
     parser.add_argument('-d', '--max-depth', type=int, default=2, help='最大爬取深度 (默认: 2)')
     parser.add_argument('-t', '--timeout', type=int, default=10, help='请求超时时间(秒) (默认: 10)')
+    parser.add_argument('-w', '--workers', type=int, default=16, help='并发爬取页面的线程数 (默认: 16)')
+    parser.add_argument('--delay', type=float, default=1, help='同一站点两次请求之间的最小间隔(秒) (默认: 1)')
+    parser.add_argument('-f', '--force', action='store_true', help='重新爬取历史运行中已爬过的页面')
     parser.add_argument('-v', '--verbose', action='store_true', help='显示详细日志')
     
     return parser.parse_args()
@@ -333,13 +679,19 @@ def main():
         base_url=args.url,
         max_pages=args.max_pages,
         max_depth=args.max_depth,
-        timeout=args.timeout
+        timeout=args.timeout,
+        max_workers=args.workers,
+        crawl_delay=args.delay,
+        force=args.force
     )
     
     # 开始爬取
     logger.info("开始爬取...")
     start_time = time.time()
-    stats = crawler.crawl()
+    try:
+        stats = crawler.crawl()
+    finally:
+        crawler.close()
     end_time = time.time()
     
     # 打印统计信息
@@ -348,6 +700,7 @@ def main():
     logger.info(f"爬取页面数: {stats['pages_crawled']}")
     logger.info(f"保存文本数: {stats['texts_saved']}")
     logger.info(f"下载图片数: {stats['images_downloaded']}")
+    logger.info(f"跳过页面数: {stats['pages_skipped']}")
     logger.info(f"错误数: {stats['errors']}")
     logger.info(f"存储目录: {crawler.storage_dir}")
 